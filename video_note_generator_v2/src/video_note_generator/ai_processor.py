@@ -3,13 +3,35 @@ AI 内容处理模块
 
 使用 OpenRouter 进行内容生成和优化
 """
-from typing import Optional, List
+from typing import Iterator, Optional, List, Union
+import asyncio
 import logging
-from openai import OpenAI
+import httpx
+from openai import AsyncOpenAI, OpenAI
 
 from .utils.text_utils import split_content
 
 
+def build_cached_prompt(static_prefix: str, dynamic_suffix: str) -> List[dict]:
+    """
+    构建可利用服务端前缀缓存的提示词分段
+
+    静态部分放在最前并标记 cache_control（Anthropic 等需要显式标记的模型），
+    OpenAI 等模型会对相同前缀自动缓存；动态内容放在最后。
+
+    Args:
+        static_prefix: 每次调用都不变的提示词前缀
+        dynamic_suffix: 随视频变化的提示词尾部
+
+    Returns:
+        消息内容分段列表
+    """
+    return [
+        {"type": "text", "text": static_prefix, "cache_control": {"type": "ephemeral"}},
+        {"type": "text", "text": dynamic_suffix},
+    ]
+
+
 class AIProcessor:
     """AI 内容处理器"""
 
@@ -35,16 +57,23 @@ class AIProcessor:
         """
         self.logger = logger or logging.getLogger(__name__)
         self.model = model
+        self._api_key = api_key
+        self._base_url = base_url
+        self._default_headers = {
+            "HTTP-Referer": http_referer,
+            "X-Title": app_name,
+        }
 
         self.client = OpenAI(
             api_key=api_key,
             base_url=base_url,
-            default_headers={
-                "HTTP-Referer": http_referer,
-                "X-Title": app_name,
-            }
+            default_headers=self._default_headers
         )
 
+        # 异步客户端按需创建（连接池绑定到创建时的事件循环）
+        self._async_client: Optional[AsyncOpenAI] = None
+        self._async_loop: Optional[asyncio.AbstractEventLoop] = None
+
         # 测试连接
         self._test_connection()
 
@@ -65,21 +94,28 @@ class AIProcessor:
             self.logger.warning("将继续尝试使用 API，但可能会遇到问题")
             return False
 
+    @staticmethod
+    def _seed_kwargs(seed: Optional[int]) -> dict:
+        """仅在指定 seed 时才传给接口，避免不支持该参数的模型报错"""
+        return {"seed": seed} if seed is not None else {}
+
     def generate_completion(
         self,
         system_prompt: str,
-        user_prompt: str,
+        user_prompt: Union[str, List[dict]],
         temperature: float = 0.7,
-        max_tokens: int = 2000
+        max_tokens: int = 2000,
+        seed: Optional[int] = None
     ) -> Optional[str]:
         """
         生成内容
 
         Args:
             system_prompt: 系统提示词
-            user_prompt: 用户提示词
+            user_prompt: 用户提示词（字符串，或 build_cached_prompt 构建的分段列表）
             temperature: 温度参数
             max_tokens: 最大 token 数
+            seed: 采样随机种子（OpenAI 兼容接口支持时可获得可复现的结果）
 
         Returns:
             生成的内容
@@ -92,7 +128,8 @@ class AIProcessor:
                     {"role": "user", "content": user_prompt}
                 ],
                 temperature=temperature,
-                max_tokens=max_tokens
+                max_tokens=max_tokens,
+                **self._seed_kwargs(seed)
             )
 
             if response.choices:
@@ -104,6 +141,138 @@ class AIProcessor:
             self.logger.error(f"AI 生成失败: {e}")
             return None
 
+    def _get_async_client(self) -> AsyncOpenAI:
+        """
+        获取异步客户端（同一事件循环内复用连接池）
+
+        事件循环变化时（如多次调用 asyncio.run）重新创建，
+        旧连接池绑定在已关闭的循环上，无法再使用。
+
+        Returns:
+            异步 OpenAI 客户端
+        """
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_loop is not loop:
+            self._async_loop = loop
+            self._async_client = AsyncOpenAI(
+                api_key=self._api_key,
+                base_url=self._base_url,
+                default_headers=self._default_headers,
+                http_client=httpx.AsyncClient(
+                    limits=httpx.Limits(max_connections=32, max_keepalive_connections=32)
+                )
+            )
+        return self._async_client
+
+    async def aclose(self):
+        """关闭异步客户端，释放连接池"""
+        if self._async_client is not None:
+            await self._async_client.close()
+            self._async_client = None
+            self._async_loop = None
+
+    async def agenerate_completion(
+        self,
+        system_prompt: str,
+        user_prompt: Union[str, List[dict]],
+        temperature: float = 0.7,
+        max_tokens: int = 2000,
+        seed: Optional[int] = None,
+        limit: Optional[asyncio.Semaphore] = None
+    ) -> Optional[str]:
+        """
+        异步生成内容（用于批量并发处理）
+
+        Args:
+            system_prompt: 系统提示词
+            user_prompt: 用户提示词（字符串，或 build_cached_prompt 构建的分段列表）
+            temperature: 温度参数
+            max_tokens: 最大 token 数
+            seed: 采样随机种子（OpenAI 兼容接口支持时可获得可复现的结果）
+            limit: 限制同时进行的请求数的信号量，为None时不限制
+
+        Returns:
+            生成的内容
+        """
+        if limit is None:
+            return await self._agenerate_completion(
+                system_prompt, user_prompt, temperature, max_tokens, seed
+            )
+
+        async with limit:
+            return await self._agenerate_completion(
+                system_prompt, user_prompt, temperature, max_tokens, seed
+            )
+
+    async def _agenerate_completion(
+        self,
+        system_prompt: str,
+        user_prompt: Union[str, List[dict]],
+        temperature: float,
+        max_tokens: int,
+        seed: Optional[int]
+    ) -> Optional[str]:
+        """发起一次异步生成请求（不做并发限制）"""
+        try:
+            response = await self._get_async_client().chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt}
+                ],
+                temperature=temperature,
+                max_tokens=max_tokens,
+                **self._seed_kwargs(seed)
+            )
+
+            if response.choices:
+                return response.choices[0].message.content.strip()
+
+            return None
+
+        except Exception as e:
+            self.logger.error(f"AI 异步生成失败: {e}")
+            return None
+
+    def generate_completion_stream(
+        self,
+        system_prompt: str,
+        user_prompt: Union[str, List[dict]],
+        temperature: float = 0.7,
+        max_tokens: int = 2000,
+        seed: Optional[int] = None
+    ) -> Iterator[str]:
+        """
+        以流式方式生成内容，逐段返回模型输出
+
+        与 generate_completion 不同，出错时直接抛出异常，由调用方决定如何处理已收到的部分内容。
+
+        Args:
+            system_prompt: 系统提示词
+            user_prompt: 用户提示词（字符串，或 build_cached_prompt 构建的分段列表）
+            temperature: 温度参数
+            max_tokens: 最大 token 数
+            seed: 采样随机种子（OpenAI 兼容接口支持时可获得可复现的结果）
+
+        Yields:
+            生成内容片段
+        """
+        stream = self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=True,
+            **self._seed_kwargs(seed)
+        )
+
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
     def organize_content(self, content: str) -> str:
         """
         整理内容为结构化文章
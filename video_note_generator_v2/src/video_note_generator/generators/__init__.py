@@ -2,5 +2,14 @@
 Content generators for different platforms
 """
 from .xiaohongshu import XiaohongshuGenerator
+from .batch import run_batch
 
-__all__ = ['XiaohongshuGenerator']
+__all__ = ['XiaohongshuGenerator', 'LegacyXiaohongshuGenerator', 'run_batch']
+
+
+def __getattr__(name):
+    # 旧版生成器仅为兼容保留，用到时才导入（其提示词较大）
+    if name == 'LegacyXiaohongshuGenerator':
+        from .xiaohongshu_legacy import LegacyXiaohongshuGenerator
+        return LegacyXiaohongshuGenerator
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,403 @@
+"""
+AI 生成结果缓存
+
+按 (提示词, 模型, 温度, 最大token数) 缓存 generate_completion 的结果，
+避免同一内容重复生成时再次调用 LLM。
+
+通过环境变量 VNG_CACHE 控制：
+- off: 关闭缓存
+- readonly: 只读取缓存，不写入
+- readwrite: 读写缓存（默认），仅缓存低温度（<=0.2）的结果
+- replay: 无论温度都读写缓存（用于测试回放）
+"""
+import asyncio
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Optional, Tuple, Union, List
+import logging
+
+
+CACHE_MODES = ("off", "readonly", "readwrite", "replay")
+
+# 低于此温度的生成结果才视为可复用
+CACHEABLE_TEMPERATURE = 0.2
+
+# 缓存有效期（秒）
+CACHE_EXPIRE = 7 * 86400
+
+# 清理过期缓存文件的最小间隔（秒），避免每次写入都扫描整个目录
+PRUNE_INTERVAL = 3600
+
+# 流式生成时每接收这么多字符记录一次进度
+STREAM_LOG_INTERVAL = 1000
+
+
+class CompletionCache:
+    """AI 生成结果的磁盘缓存"""
+
+    def __init__(self, cache_dir: Path, expire: int = CACHE_EXPIRE):
+        """
+        初始化缓存
+
+        Args:
+            cache_dir: 缓存目录
+            expire: 缓存有效期（秒）
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.expire = expire
+        self.hits = 0
+        self.misses = 0
+        self._last_prune = 0.0
+
+    @staticmethod
+    def make_key(
+        system_prompt: str,
+        user_prompt: Union[str, List[dict]],
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        seed: Optional[int] = None
+    ) -> str:
+        """
+        生成缓存键
+
+        Args:
+            system_prompt: 系统提示词
+            user_prompt: 用户提示词（字符串或分段列表）
+            model: 模型名称
+            temperature: 温度参数
+            max_tokens: 最大 token 数
+            seed: 采样随机种子
+
+        Returns:
+            缓存键
+        """
+        if not isinstance(user_prompt, str):
+            user_prompt = json.dumps(user_prompt, ensure_ascii=False, sort_keys=True)
+
+        raw = "\0".join(
+            [system_prompt, user_prompt, model, str(temperature), str(max_tokens), str(seed)]
+        )
+        return hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        读取缓存
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            缓存的生成结果，不存在或已过期返回None（允许写入时删除过期文件）
+        """
+        cache_file = self.cache_dir / f"{key}.json"
+
+        if not cache_file.exists():
+            return None
+
+        try:
+            with open(cache_file, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except Exception:
+            return None
+
+        if time.time() - entry.get('created', 0) > self.expire:
+            if get_cache_mode() != "readonly":
+                self._remove(cache_file)
+            return None
+
+        return entry.get('content')
+
+    def set(
+        self,
+        key: str,
+        content: str,
+        model: str,
+        logger: Optional[logging.Logger] = None
+    ):
+        """
+        写入缓存，并定期清理已过期的缓存文件
+
+        Args:
+            key: 缓存键
+            content: 生成结果
+            model: 模型名称
+            logger: 日志记录器
+        """
+        logger = logger or logging.getLogger(__name__)
+        cache_file = self.cache_dir / f"{key}.json"
+
+        try:
+            with open(cache_file, 'w', encoding='utf-8') as f:
+                json.dump(
+                    {'created': time.time(), 'model': model, 'content': content},
+                    f,
+                    ensure_ascii=False
+                )
+        except Exception as e:
+            logger.warning("保存生成缓存失败: %s", e)
+
+        self._prune()
+
+    def _prune(self):
+        """
+        删除修改时间早于有效期的缓存文件
+
+        只看文件时间、不读取内容，且每 PRUNE_INTERVAL 秒最多扫描一次目录
+        """
+        now = time.time()
+        if now - self._last_prune < PRUNE_INTERVAL:
+            return
+        self._last_prune = now
+
+        deadline = now - self.expire
+        for cache_file in self.cache_dir.glob("*.json"):
+            try:
+                if cache_file.stat().st_mtime < deadline:
+                    self._remove(cache_file)
+            except OSError:
+                continue
+
+    @staticmethod
+    def _remove(cache_file: Path):
+        """删除缓存文件（并发删除时忽略文件已不存在的错误）"""
+        try:
+            cache_file.unlink()
+        except OSError:
+            pass
+
+
+_cache: Optional[CompletionCache] = None
+
+
+def sampling_params(
+    content: str,
+    temperature: float,
+    deterministic: bool
+) -> Tuple[float, Optional[int]]:
+    """
+    计算采样参数
+
+    可复现模式下温度固定为 0，并用内容哈希作为 seed，
+    同一内容的结果因此可以缓存和复现。
+
+    Args:
+        content: 用于生成 seed 的内容
+        temperature: 非可复现模式下使用的温度
+        deterministic: 是否启用可复现模式
+
+    Returns:
+        (温度, seed) 元组
+    """
+    if not deterministic:
+        return temperature, None
+
+    seed = int(hashlib.blake2b(content.encode()).hexdigest()[:8], 16)
+    return 0.0, seed
+
+
+def _call_model(
+    ai_processor,
+    system_prompt: str,
+    user_prompt: Union[str, List[dict]],
+    temperature: float,
+    max_tokens: int,
+    seed: Optional[int],
+    stream: bool,
+    logger: logging.Logger
+) -> Optional[str]:
+    """
+    调用 AI 生成内容，stream 为 True 时使用流式接口并拼接结果
+
+    Returns:
+        生成的内容，失败返回None
+    """
+    if not stream:
+        return ai_processor.generate_completion(
+            system_prompt=system_prompt,
+            user_prompt=user_prompt,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            seed=seed
+        )
+
+    chunks = []
+    received = 0
+    next_log = STREAM_LOG_INTERVAL
+    debug = logger.isEnabledFor(logging.DEBUG)
+    try:
+        for chunk in ai_processor.generate_completion_stream(
+            system_prompt=system_prompt,
+            user_prompt=user_prompt,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            seed=seed
+        ):
+            chunks.append(chunk)
+            if debug:
+                received += len(chunk)
+                if received >= next_log:
+                    logger.debug("已接收 %d 字符", received)
+                    next_log = received + STREAM_LOG_INTERVAL
+    except Exception as e:
+        logger.error("AI 流式生成失败: %s", e)
+        return None
+
+    result = ''.join(chunks).strip()
+    return result or None
+
+
+def get_cache_mode() -> str:
+    """获取当前缓存模式（读取环境变量 VNG_CACHE）"""
+    mode = os.environ.get("VNG_CACHE", "readwrite").strip().lower()
+    return mode if mode in CACHE_MODES else "readwrite"
+
+
+def get_cache() -> CompletionCache:
+    """获取全局缓存实例（单例模式）"""
+    global _cache
+    if _cache is None:
+        _cache = CompletionCache(Path(os.path.expanduser("~/.cache/vng/completions")))
+    return _cache
+
+
+def _lookup(
+    ai_processor,
+    system_prompt: str,
+    user_prompt: Union[str, List[dict]],
+    temperature: float,
+    max_tokens: int,
+    seed: Optional[int],
+    logger: logging.Logger
+) -> Tuple[Optional[str], Optional[str]]:
+    """
+    查询缓存
+
+    Returns:
+        (缓存键, 缓存结果) 元组；不可缓存时缓存键为None
+    """
+    mode = get_cache_mode()
+
+    # 高温度的结果每次都不同，缓存没有意义（回放模式除外）
+    cacheable = mode == "replay" or (mode != "off" and temperature <= CACHEABLE_TEMPERATURE)
+    if not cacheable:
+        return None, None
+
+    cache = get_cache()
+    key = cache.make_key(
+        system_prompt, user_prompt, ai_processor.model, temperature, max_tokens, seed
+    )
+
+    cached = cache.get(key)
+    if cached is not None:
+        cache.hits += 1
+        logger.info("命中生成缓存（命中 %d 次，未命中 %d 次）", cache.hits, cache.misses)
+        return key, cached
+
+    cache.misses += 1
+    logger.debug("未命中生成缓存（命中 %d 次，未命中 %d 次）", cache.hits, cache.misses)
+    return key, None
+
+
+def _store(
+    key: Optional[str],
+    result: Optional[str],
+    model: str,
+    logger: logging.Logger
+):
+    """生成成功且允许写入时保存到缓存"""
+    if key and result and get_cache_mode() != "readonly":
+        get_cache().set(key, result, model, logger)
+
+
+def get_or_call(
+    ai_processor,
+    system_prompt: str,
+    user_prompt: Union[str, List[dict]],
+    temperature: float = 0.7,
+    max_tokens: int = 2000,
+    seed: Optional[int] = None,
+    stream: bool = False,
+    logger: Optional[logging.Logger] = None
+) -> Optional[str]:
+    """
+    优先从缓存读取生成结果，未命中时调用 AI 并写入缓存
+
+    Args:
+        ai_processor: AI 处理器
+        system_prompt: 系统提示词
+        user_prompt: 用户提示词
+        temperature: 温度参数
+        max_tokens: 最大 token 数
+        seed: 采样随机种子
+        stream: 是否使用流式接口调用 AI
+        logger: 日志记录器
+
+    Returns:
+        生成的内容
+    """
+    logger = logger or logging.getLogger(__name__)
+
+    key, cached = _lookup(
+        ai_processor, system_prompt, user_prompt, temperature, max_tokens, seed, logger
+    )
+    if cached is not None:
+        return cached
+
+    result = _call_model(
+        ai_processor, system_prompt, user_prompt, temperature, max_tokens, seed, stream, logger
+    )
+    _store(key, result, ai_processor.model, logger)
+
+    return result
+
+
+async def aget_or_call(
+    ai_processor,
+    system_prompt: str,
+    user_prompt: Union[str, List[dict]],
+    temperature: float = 0.7,
+    max_tokens: int = 2000,
+    seed: Optional[int] = None,
+    logger: Optional[logging.Logger] = None,
+    limit: Optional[asyncio.Semaphore] = None
+) -> Optional[str]:
+    """
+    get_or_call 的异步版本，未命中时调用 AIProcessor.agenerate_completion
+
+    Args:
+        ai_processor: AI 处理器
+        system_prompt: 系统提示词
+        user_prompt: 用户提示词
+        temperature: 温度参数
+        max_tokens: 最大 token 数
+        seed: 采样随机种子
+        logger: 日志记录器
+        limit: 限制同时进行的 LLM 调用数的信号量（命中缓存时不占用）
+
+    Returns:
+        生成的内容
+    """
+    logger = logger or logging.getLogger(__name__)
+
+    key, cached = _lookup(
+        ai_processor, system_prompt, user_prompt, temperature, max_tokens, seed, logger
+    )
+    if cached is not None:
+        return cached
+
+    result = await ai_processor.agenerate_completion(
+        system_prompt=system_prompt,
+        user_prompt=user_prompt,
+        temperature=temperature,
+        max_tokens=max_tokens,
+        seed=seed,
+        limit=limit
+    )
+    _store(key, result, ai_processor.model, logger)
+
+    return result
@@ -0,0 +1,268 @@
+"""
+语义相似缓存
+
+对转录内容做向量化，若与之前生成过的内容足够相似（重新上传、同一讲座的剪辑等），
+直接复用之前生成的博客/笔记，跳过 LLM 调用。
+
+依赖 sentence-transformers 和 faiss（可选），通过环境变量 VNG_SEMCACHE=on 开启。
+"""
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+
+from ._completion_cache import CACHE_EXPIRE
+
+
+# 多语言模型，转录内容以中文为主
+DEFAULT_MODEL = "paraphrase-multilingual-MiniLM-L12-v2"
+
+# 余弦相似度达到此阈值视为同一内容
+DEFAULT_THRESHOLD = 0.95
+
+# 两段内容的长度比（短/长）低于此值时不视为同一内容
+MIN_LENGTH_RATIO = 0.9
+
+# 查询时取最相似的候选数（相似度过阈值后还需通过长度校验）
+SEARCH_K = 5
+
+# 每种产物最多保留的记录数，超出时淘汰最早的记录
+MAX_ENTRIES = 1000
+
+# 启动时预加载的产物类型（索引文件损坏时在初始化阶段就能发现）
+KINDS = ("blog", "xiaohongshu")
+
+
+class SemanticCache:
+    """基于向量相似度的生成结果缓存"""
+
+    def __init__(
+        self,
+        cache_dir: Path,
+        model_name: str = DEFAULT_MODEL,
+        threshold: float = DEFAULT_THRESHOLD,
+        expire: int = CACHE_EXPIRE,
+        max_entries: int = MAX_ENTRIES
+    ):
+        """
+        初始化语义缓存
+
+        Args:
+            cache_dir: 缓存目录
+            model_name: 向量化模型名称
+            threshold: 命中所需的最低余弦相似度
+            expire: 记录有效期（秒），与生成结果缓存一致
+            max_entries: 每种产物最多保留的记录数
+
+        Raises:
+            ImportError: 未安装 sentence-transformers 或 faiss
+            Exception: 模型下载失败或缓存文件损坏等
+        """
+        import faiss
+        from sentence_transformers import SentenceTransformer
+
+        self._faiss = faiss
+        self.model = SentenceTransformer(model_name)
+        self.dim = self.model.get_sentence_embedding_dimension()
+        self.threshold = threshold
+        self.expire = expire
+        self.max_entries = max_entries
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        # 每种产物（blog / xiaohongshu）各自一个索引，避免串用
+        self._indexes: Dict[str, Tuple[Any, List[Any]]] = {}
+        self._lock = threading.Lock()
+
+        for kind in KINDS:
+            self._load(kind)
+
+    def _paths(self, kind: str) -> Tuple[Path, Path]:
+        """获取索引文件和产物文件路径"""
+        return self.cache_dir / f"sem_{kind}.idx", self.cache_dir / f"sem_{kind}.json"
+
+    def _load(self, kind: str) -> Tuple[Any, List[Any]]:
+        """加载（或新建）指定类型的索引和产物列表"""
+        if kind not in self._indexes:
+            index_file, entries_file = self._paths(kind)
+            index = entries = None
+            if index_file.exists() and entries_file.exists():
+                index = self._faiss.read_index(str(index_file))
+                with open(entries_file, 'r', encoding='utf-8') as f:
+                    entries = json.load(f)
+            # 两个文件分别写入，中途中断时可能对不上，此时整体丢弃
+            if index is None or index.ntotal != len(entries):
+                index = self._faiss.IndexFlatIP(self.dim)
+                entries = []
+            self._indexes[kind] = (index, entries)
+        return self._indexes[kind]
+
+    def _evict(self, index: Any, entries: List[Any]):
+        """
+        淘汰过期和超出数量上限的记录
+
+        记录按写入时间顺序追加，需要淘汰的总是开头的一段，
+        直接按编号区间从索引中删除即可（删除后其余记录的编号依次前移）。
+        """
+        deadline = time.time() - self.expire
+        drop = max(0, len(entries) - self.max_entries)
+        while drop < len(entries) and self._created(entries[drop]) < deadline:
+            drop += 1
+
+        if drop:
+            index.remove_ids(self._faiss.IDSelectorRange(0, drop))
+            del entries[:drop]
+
+    @staticmethod
+    def _created(entry: Any) -> float:
+        """记录的写入时间（旧格式的记录视为已过期）"""
+        return entry.get('created', 0) if isinstance(entry, dict) else 0
+
+    @staticmethod
+    def _write_atomic(path: Path, write):
+        """先写入临时文件再替换，避免中途中断留下不完整的文件"""
+        tmp_file = path.with_name(path.name + ".tmp")
+        write(tmp_file)
+        os.replace(tmp_file, path)
+
+    def _chunks(self, content: str) -> List[str]:
+        """按模型的最大输入长度切分内容（超出部分会被模型截断）"""
+        tokenizer = self.model.tokenizer
+        window = self.model.max_seq_length - 2  # 留出 [CLS] 和 [SEP]
+        ids = tokenizer(content, add_special_tokens=False)['input_ids']
+        chunks = [tokenizer.decode(ids[i:i + window]) for i in range(0, len(ids), window)]
+        return chunks or [content]
+
+    def _encode(self, content: str):
+        """将完整内容分块编码后取平均，得到归一化向量（内积即余弦相似度）"""
+        vecs = self.model.encode(self._chunks(content), normalize_embeddings=True)
+        vec = vecs.mean(axis=0, keepdims=True).astype('float32')
+        self._faiss.normalize_L2(vec)
+        return vec
+
+    def _matches(self, entry: Any, length: int) -> bool:
+        """相似度达标的候选还需未过期、长度相近（旧格式的记录一律不命中）"""
+        if self._created(entry) < time.time() - self.expire:
+            return False
+        cached_length = entry.get('length', 0)
+        return min(length, cached_length) >= MIN_LENGTH_RATIO * max(length, cached_length)
+
+    def lookup(
+        self,
+        kind: str,
+        content: str,
+        logger: Optional[logging.Logger] = None
+    ) -> Optional[Any]:
+        """
+        查找相似内容的生成结果
+
+        Args:
+            kind: 产物类型
+            content: 输入内容
+            logger: 日志记录器
+
+        Returns:
+            缓存的生成结果，未命中或查询失败返回None
+        """
+        logger = logger or logging.getLogger(__name__)
+
+        try:
+            vec = self._encode(content)
+
+            with self._lock:
+                index, entries = self._load(kind)
+                if index.ntotal == 0:
+                    return None
+                scores, ids = index.search(vec, min(SEARCH_K, index.ntotal))
+                candidates = [
+                    entries[i] for score, i in zip(scores[0], ids[0])
+                    if i >= 0 and score >= self.threshold
+                ]
+        except Exception as e:
+            logger.warning("语义缓存查询失败: %s", e)
+            return None
+
+        for entry in candidates:
+            if self._matches(entry, len(content)):
+                return entry['artifact']
+        return None
+
+    def add(
+        self,
+        kind: str,
+        content: str,
+        artifact: Any,
+        logger: Optional[logging.Logger] = None
+    ):
+        """
+        记录生成结果，并淘汰过期和超出数量上限的记录
+
+        Args:
+            kind: 产物类型
+            content: 输入内容
+            artifact: 生成结果（需可 JSON 序列化）
+            logger: 日志记录器
+        """
+        logger = logger or logging.getLogger(__name__)
+
+        try:
+            vec = self._encode(content)
+
+            with self._lock:
+                index, entries = self._load(kind)
+                index.add(vec)
+                entries.append(
+                    {'artifact': artifact, 'length': len(content), 'created': time.time()}
+                )
+                self._evict(index, entries)
+
+                def write_entries(path: Path):
+                    with open(path, 'w', encoding='utf-8') as f:
+                        json.dump(entries, f, ensure_ascii=False)
+
+                index_file, entries_file = self._paths(kind)
+                self._write_atomic(
+                    index_file, lambda path: self._faiss.write_index(index, str(path))
+                )
+                self._write_atomic(entries_file, write_entries)
+        except Exception as e:
+            logger.warning("保存语义缓存失败: %s", e)
+
+
+_semcache: Optional[SemanticCache] = None
+_semcache_unavailable = False
+_semcache_init_lock = threading.Lock()
+
+
+def get_semantic_cache(logger: Optional[logging.Logger] = None) -> Optional[SemanticCache]:
+    """
+    获取全局语义缓存实例（单例模式）
+
+    Args:
+        logger: 日志记录器
+
+    Returns:
+        语义缓存实例；未开启、依赖缺失或初始化失败时返回None
+    """
+    global _semcache, _semcache_unavailable
+
+    if os.environ.get("VNG_SEMCACHE", "off").strip().lower() not in ("on", "1", "true"):
+        return None
+
+    with _semcache_init_lock:
+        if _semcache is None and not _semcache_unavailable:
+            logger = logger or logging.getLogger(__name__)
+            try:
+                _semcache = SemanticCache(Path(os.path.expanduser("~/.cache/vng")))
+            except ImportError as e:
+                logger.warning("语义缓存需要安装 sentence-transformers 和 faiss-cpu，已跳过: %s", e)
+                _semcache_unavailable = True
+            except Exception as e:
+                # 离线时模型下载失败、缓存文件损坏等，都不应影响正常生成
+                logger.warning("语义缓存初始化失败，已跳过: %s", e)
+                _semcache_unavailable = True
+
+    return _semcache
@@ -0,0 +1,98 @@
+"""
+批量内容生成
+
+多个视频的博客和小红书生成请求并发发出，用信号量限制同时进行的 LLM 调用数，
+避免超出服务商的并发/速率限制。
+"""
+import asyncio
+from collections import Counter
+from typing import List, Optional
+import logging
+
+from .blog import BlogGenerator
+from .xiaohongshu import XiaohongshuGenerator
+
+
+# 正在执行的批次对各 AI 处理器的引用数（多个批次重叠时，最后一个结束的批次才关闭客户端）
+_active_batches: Counter = Counter()
+
+
+async def run_batch(
+    videos: List[dict],
+    blog_generator: Optional[BlogGenerator] = None,
+    xiaohongshu_generator: Optional[XiaohongshuGenerator] = None,
+    concurrency: int = 8,
+    blog_max_tokens: int = 16000,
+    xiaohongshu_max_tokens: int = 2000,
+    deterministic: bool = False,
+    logger: Optional[logging.Logger] = None
+) -> List[dict]:
+    """
+    并发生成多个视频的博客和小红书笔记
+
+    Args:
+        videos: 视频列表，每项包含 content（整理后的内容）和 video_info（视频信息）
+        blog_generator: 博客生成器，为None时不生成博客
+        xiaohongshu_generator: 小红书生成器，为None时不生成小红书笔记
+        concurrency: 同时进行的最大 LLM 调用数（每个视频最多发起 3 次调用：
+            博客、小红书标题、小红书正文）
+        blog_max_tokens: 博客最大生成token数
+        xiaohongshu_max_tokens: 小红书最大生成token数
+        deterministic: 可复现模式（温度为0、按内容固定seed，重跑时可命中缓存）
+        logger: 日志记录器
+
+    Returns:
+        与 videos 顺序一致的结果列表，每项包含 blog 和 xiaohongshu
+        （(笔记内容, 标题列表, 标签列表) 元组）
+    """
+    logger = logger or logging.getLogger(__name__)
+    total = len(videos)
+    # 信号量随每次 LLM 调用传递（而不是按视频加锁），本批次内所有调用共用同一个限额
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def process(index: int, video: dict) -> dict:
+        logger.info("批量生成第 %d/%d 个视频", index, total)
+        tasks = []
+        if blog_generator:
+            tasks.append(blog_generator.agenerate(
+                content=video['content'],
+                video_info=video.get('video_info', {}),
+                max_tokens=blog_max_tokens,
+                deterministic=deterministic,
+                limit=semaphore
+            ))
+        if xiaohongshu_generator:
+            tasks.append(xiaohongshu_generator.agenerate(
+                content=video['content'],
+                max_tokens=xiaohongshu_max_tokens,
+                deterministic=deterministic,
+                limit=semaphore
+            ))
+
+        outputs = await asyncio.gather(*tasks)
+
+        result = {'blog': None, 'xiaohongshu': None}
+        if blog_generator:
+            result['blog'] = outputs[0]
+        if xiaohongshu_generator:
+            result['xiaohongshu'] = outputs[-1]
+        return result
+
+    # 所有生成器共用 AI 处理器的异步客户端，批次结束后统一关闭
+    ai_processors = {
+        id(g.ai_processor): g.ai_processor
+        for g in (blog_generator, xiaohongshu_generator) if g
+    }
+    for ai_processor in ai_processors.values():
+        _active_batches[ai_processor] += 1
+
+    try:
+        return await asyncio.gather(
+            *(process(i, video) for i, video in enumerate(videos, 1))
+        )
+    finally:
+        for ai_processor in ai_processors.values():
+            _active_batches[ai_processor] -= 1
+            if _active_batches[ai_processor] <= 0:
+                del _active_batches[ai_processor]
+                await ai_processor.aclose()
@@ -3,26 +3,42 @@
 
 将视频转录内容转化为深度博客文章
 """
-from typing import Optional, Tuple
+import asyncio
+import re
+from typing import List, Optional, Tuple
 import logging
 
+from ..ai_processor import build_cached_prompt
+from ._completion_cache import aget_or_call, get_or_call, sampling_params
+from ._semcache import get_semantic_cache
 
-class BlogGenerator:
-    """博客文章生成器"""
 
-    def __init__(self, ai_processor, logger: Optional[logging.Logger] = None):
-        """
-        初始化博客生成器
+# 文章开头的 "思想来源/原始视频" 两行（带英文翻译的格式）
+_RE_META_HEADER_TRANSLATED = re.compile(
+    r'^[\n\s]*思想来源\s*\([^)]*\):[^\n]*\n原始视频\s*\([^)]*\):[^\n]*\n', re.MULTILINE
+)
+# 不带括号的简单格式
+_RE_META_HEADER = re.compile(r'^[\n\s]*思想来源:[^\n]*\n原始视频:[^\n]*\n', re.MULTILINE)
+# 结尾的 "文章元信息" 段落、单独出现的元信息列表和 AI 创作声明，
+# 三者都是从匹配处删到文末，合并为一次扫描（取最靠前的匹配）。
+# 开头两行必须先单独移除：它们可能夹在 "---" 和 AI 创作声明之间
+_RE_META_TAIL = re.compile(
+    r'(?:\n*---\n*\*\*文章元信息\*\*'
+    r'|\n*- 思想来源.*?\n- 原始视频.*?\n'
+    r'|\n*---\n*\*本文由 AI 辅助创作).*\Z',
+    re.DOTALL
+)
 
-        Args:
-            ai_processor: AI处理器实例
-            logger: 日志记录器
-        """
-        self.ai_processor = ai_processor
-        self.logger = logger or logging.getLogger(__name__)
+# 内容短于此字符数时不调用 AI（生成结果没有意义）
+_MIN_CONTENT_CHARS = 50
 
-        # 博客生成提示词
-        self.blog_prompt = """YouTube视频转博客提示词
+
+class BlogGenerator:
+    """博客文章生成器"""
+
+    # 博客生成提示词模板（类级常量，所有实例共用一份）。
+    # {content} 之前的部分与视频无关，作为静态前缀单独发送以命中服务端前缀缓存
+    blog_prompt: str = """YouTube视频转博客提示词
 
 你是一位顶级的深度内容创作者与思想转述者，拥有将任何复杂信息转化为一篇结构精巧、文笔优美、思想深刻的中文博客文章的卓越能力。你的写作风格不是信息的罗列，而是思想的启迪；你的文章不仅让人读懂，更让人思考。
 
@@ -109,11 +125,62 @@ class BlogGenerator:
 
 {content}"""
 
+    def __init__(self, ai_processor, logger: Optional[logging.Logger] = None):
+        """
+        初始化博客生成器
+
+        Args:
+            ai_processor: AI处理器实例
+            logger: 日志记录器
+        """
+        self.ai_processor = ai_processor
+        self.logger = logger or logging.getLogger(__name__)
+
+    def _build_prompts(self, content: str, video_info: dict) -> Tuple[str, List[dict]]:
+        """
+        构建博客生成的提示词
+
+        Args:
+            content: 整理后的视频内容
+            video_info: 视频信息（标题、作者、链接等）
+
+        Returns:
+            (系统提示词, 用户提示词) 元组
+        """
+        # 构建包含视频信息的内容
+        full_content = f"""
+视频标题：{video_info.get('title', '未知')}
+视频作者：{video_info.get('uploader', '未知')}
+视频链接：{video_info.get('url', '')}
+视频平台：{video_info.get('platform', '未知')}
+
+视频内容：
+{content}
+"""
+
+        system_prompt = "你是一位顶级的深度内容创作者与思想转述者。"
+        # 静态提示词在前、视频内容在后，保证前缀字节一致以复用缓存
+        static_prefix, _, suffix = self.blog_prompt.partition("{content}")
+        user_prompt = build_cached_prompt(static_prefix, full_content + suffix)
+
+        return system_prompt, user_prompt
+
+    def _check_result(self, blog_content: Optional[str]) -> Optional[str]:
+        """检查并记录生成结果"""
+        if blog_content:
+            self.logger.info("✅ 博客文章生成成功（%d字符）", len(blog_content))
+            return blog_content
+
+        self.logger.error("博客文章生成失败：AI返回空内容")
+        return None
+
     def generate(
         self,
         content: str,
         video_info: dict,
-        max_tokens: int = 4000
+        max_tokens: int = 4000,
+        stream: bool = False,
+        deterministic: bool = False
     ) -> Optional[str]:
         """
         生成博客文章
@@ -122,46 +189,135 @@ class BlogGenerator:
             content: 整理后的视频内容
             video_info: 视频信息（标题、作者、链接等）
             max_tokens: 最大生成token数
+            stream: 是否以流式方式接收生成结果（长文首字节更快到达）
+            deterministic: 可复现模式（温度为0、按内容固定seed，结果可缓存）
 
         Returns:
             博客文章内容，失败返回None
         """
+        if not content or len(content.strip()) < _MIN_CONTENT_CHARS:
+            self.logger.warning("内容过短，跳过博客文章生成")
+            return None
+
         try:
             self.logger.info("开始生成博客文章...")
 
-            # 构建包含视频信息的内容
-            full_content = f"""
-视频标题：{video_info.get('title', '未知')}
-视频作者：{video_info.get('uploader', '未知')}
-视频链接：{video_info.get('url', '')}
-视频平台：{video_info.get('platform', '未知')}
+            # 相似内容（重新上传、剪辑版等）已生成过时直接复用
+            # （可复现模式下结果必须由 seed 决定，不走语义缓存）
+            if not deterministic:
+                cached = self._semantic_lookup(content)
+                if cached:
+                    return cached
 
-视频内容：
-{content}
-"""
+            system_prompt, user_prompt = self._build_prompts(content, video_info)
+            # 平时用稍高温度以增加创意，可复现模式下固定温度和seed
+            temperature, seed = sampling_params(content, 0.8, deterministic)
 
             # 使用AI生成博客
-            system_prompt = "你是一位顶级的深度内容创作者与思想转述者。"
-            user_prompt = self.blog_prompt.format(content=full_content)
+            blog_content = get_or_call(
+                self.ai_processor,
+                system_prompt=system_prompt,
+                user_prompt=user_prompt,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                seed=seed,
+                stream=stream,
+                logger=self.logger
+            )
+
+            blog_content = self._check_result(blog_content)
+            if blog_content and not deterministic:
+                self._semantic_store(content, blog_content)
+            return blog_content
 
-            blog_content = self.ai_processor.generate_completion(
+        except Exception as e:
+            self.logger.error("生成博客文章失败: %s", e, exc_info=True)
+            return None
+
+    async def agenerate(
+        self,
+        content: str,
+        video_info: dict,
+        max_tokens: int = 4000,
+        deterministic: bool = False,
+        limit: Optional[asyncio.Semaphore] = None
+    ) -> Optional[str]:
+        """
+        异步生成博客文章（用于批量并发处理）
+
+        Args:
+            content: 整理后的视频内容
+            video_info: 视频信息（标题、作者、链接等）
+            max_tokens: 最大生成token数
+            deterministic: 可复现模式（温度为0、按内容固定seed，结果可缓存）
+            limit: 限制同时进行的 LLM 调用数的信号量，为None时不限制
+
+        Returns:
+            博客文章内容，失败返回None
+        """
+        if not content or len(content.strip()) < _MIN_CONTENT_CHARS:
+            self.logger.warning("内容过短，跳过博客文章生成")
+            return None
+
+        try:
+            self.logger.info("开始生成博客文章...")
+
+            # 向量化是 CPU 密集操作，放到线程池中执行，不阻塞事件循环
+            loop = asyncio.get_running_loop()
+            if not deterministic:
+                cached = await loop.run_in_executor(None, self._semantic_lookup, content)
+                if cached:
+                    return cached
+
+            system_prompt, user_prompt = self._build_prompts(content, video_info)
+            # 平时用稍高温度以增加创意，可复现模式下固定温度和seed
+            temperature, seed = sampling_params(content, 0.8, deterministic)
+
+            blog_content = await aget_or_call(
+                self.ai_processor,
                 system_prompt=system_prompt,
                 user_prompt=user_prompt,
                 max_tokens=max_tokens,
-                temperature=0.8  # 稍高温度以增加创意
+                temperature=temperature,
+                seed=seed,
+                logger=self.logger,
+                limit=limit
             )
 
-            if blog_content:
-                self.logger.info(f"✅ 博客文章生成成功（{len(blog_content)}字符）")
-                return blog_content
-            else:
-                self.logger.error("博客文章生成失败：AI返回空内容")
-                return None
+            blog_content = self._check_result(blog_content)
+            if blog_content and not deterministic:
+                await loop.run_in_executor(None, self._semantic_store, content, blog_content)
+            return blog_content
 
         except Exception as e:
-            self.logger.error(f"生成博客文章失败: {e}", exc_info=True)
+            self.logger.error("生成博客文章失败: %s", e, exc_info=True)
+            return None
+
+    def _semantic_lookup(self, content: str) -> Optional[str]:
+        """
+        查找相似内容已生成的博客文章
+
+        Args:
+            content: 整理后的视频内容
+
+        Returns:
+            博客文章内容，未开启语义缓存或未命中返回None
+        """
+        semcache = get_semantic_cache(self.logger)
+        if not semcache:
             return None
 
+        cached = semcache.lookup("blog", content, logger=self.logger)
+        if cached:
+            self.logger.info("命中语义缓存，复用相似内容的博客文章")
+        return cached
+
+    def _semantic_store(self, content: str, blog_content: str):
+        """记录生成的博客文章，供相似内容复用"""
+        semcache = get_semantic_cache(self.logger)
+        if semcache:
+            semcache.add("blog", content, blog_content, logger=self.logger)
+
     def format_blog(
         self,
         content: str,
@@ -177,49 +333,10 @@ class BlogGenerator:
         Returns:
             格式化后的博客文章
         """
-        import re
-
         # 移除AI生成内容中已有的元信息部分（避免重复）
-
-        # 首先移除文章开头的元信息（带英文翻译的格式）
-        content_cleaned = re.sub(
-            r'^[\n\s]*思想来源\s*\([^)]*\):[^\n]*\n原始视频\s*\([^)]*\):[^\n]*\n',
-            '',
-            content,
-            flags=re.MULTILINE
-        ).strip()
-
-        # 也移除不带括号的简单格式
-        content_cleaned = re.sub(
-            r'^[\n\s]*思想来源:[^\n]*\n原始视频:[^\n]*\n',
-            '',
-            content_cleaned,
-            flags=re.MULTILINE
-        ).strip()
-
-        # 查找并移除 "思想来源" 到文章结尾的部分
-        content_cleaned = re.sub(
-            r'\n*---\n*\*\*文章元信息\*\*.*$',
-            '',
-            content_cleaned,
-            flags=re.DOTALL
-        ).strip()
-
-        # 移除可能单独出现的元信息行
-        content_cleaned = re.sub(
-            r'\n*- 思想来源.*?\n- 原始视频.*?\n.*$',
-            '',
-            content_cleaned,
-            flags=re.DOTALL
-        ).strip()
-
-        # 移除末尾的AI创作声明
-        content_cleaned = re.sub(
-            r'\n*---\n*\*本文由 AI 辅助创作.*$',
-            '',
-            content_cleaned,
-            flags=re.DOTALL
-        ).strip()
+        content_cleaned = _RE_META_HEADER_TRANSLATED.sub('', content).strip()
+        content_cleaned = _RE_META_HEADER.sub('', content_cleaned).strip()
+        content_cleaned = _RE_META_TAIL.sub('', content_cleaned).strip()
 
         # 直接返回清理后的内容，不添加元信息
         return content_cleaned
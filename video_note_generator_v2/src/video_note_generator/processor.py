@@ -343,7 +343,8 @@ class VideoNoteProcessor:
             blog_content = self.blog_generator.generate(
                 content=content,
                 video_info=video_info_dict,
-                max_tokens=16000  # 博客要完整呈现所有内容，不受长度限制
+                max_tokens=16000,  # 博客要完整呈现所有内容，不受长度限制
+                stream=True  # 长文流式接收，避免长时间无响应
             )
 
             if blog_content:
@@ -0,0 +1,61 @@
+"""
+BlogGenerator.format_blog 元信息清理测试
+
+开头的元信息两行先单独移除；元信息列表、元信息段落和 AI 创作声明
+一旦出现，从该处起到文末全部移除。
+"""
+import pytest
+
+from video_note_generator.generators.blog import BlogGenerator
+
+
+@pytest.fixture
+def generator():
+    return BlogGenerator(ai_processor=None)
+
+
+def format_blog(generator, content):
+    return generator.format_blog(content, video_info={})
+
+
+def test_plain_content_unchanged(generator):
+    assert format_blog(generator, "# 标题\n\n正文段落。") == "# 标题\n\n正文段落。"
+
+
+@pytest.mark.parametrize("header", [
+    "思想来源: 张三\n原始视频: https://example.com\n",
+    "思想来源 (Source of Inspiration): 张三\n原始视频 (Original Video): https://example.com\n",
+])
+def test_removes_leading_header(generator, header):
+    assert format_blog(generator, header + "# 标题\n正文") == "# 标题\n正文"
+
+
+def test_removes_meta_section_to_end(generator):
+    content = "# 标题\n正文\n\n---\n**文章元信息**\n- 思想来源: 张三\n"
+    assert format_blog(generator, content) == "# 标题\n正文"
+
+
+def test_removes_ai_disclaimer_to_end(generator):
+    content = "# 标题\n正文\n\n---\n*本文由 AI 辅助创作*"
+    assert format_blog(generator, content) == "# 标题\n正文"
+
+
+def test_meta_list_removes_everything_after_it(generator):
+    content = "# 标题\n正文\n- 思想来源: A\n- 原始视频: u\n尾巴"
+    assert format_blog(generator, content) == "# 标题\n正文"
+
+
+def test_meta_list_without_trailing_line_is_kept(generator):
+    # 去掉首尾空白后列表后面没有换行，不视为元信息列表
+    content = "  \n- 思想来源: A\n- 原始视频: u\n"
+    assert format_blog(generator, content) == "- 思想来源: A\n- 原始视频: u"
+
+
+def test_removes_header_between_separator_and_disclaimer(generator):
+    content = (
+        "# 标题\n\n正文。\n\n---\n"
+        "思想来源 (Source of Inspiration): 张三\n"
+        "原始视频 (Original Video): https://x\n\n"
+        "*本文由 AI 辅助创作，仅供参考*\n"
+    )
+    assert format_blog(generator, content) == "# 标题\n\n正文。"